@@ -1,9 +1,6 @@
 import re
 
 
-isa_regex = \
-re.compile("^RV(32|64|128)[IE]+[ABCDEFGHJKLMNPQSTUVX]*(Zicsr|Zifencei|Zihintpause|Zam|Ztso|Zkne|Zknd|Zknh|Zkse|Zksh|Zkg|Zkb|Zkr|Zks|Zkn|Zba|Zbc|Zbb|Zbp|Zbr|Zbm|Zbs|Zbe|Zbf|Zbt|Zmmul|Zbpbo|Zca|Zcf|Zcd|Zcb|Zcmp|Zcmt){,1}(_Zicsr){,1}(_Zifencei){,1}(_Zihintpause){,1}(_Zmmul){,1}(_Zam){,1}(_Zba){,1}(_Zbb){,1}(_Zbc){,1}(_Zbe){,1}(_Zbf){,1}(_Zbm){,1}(_Zbp){,1}(_Zbpbo){,1}(_Zbr){,1}(_Zbs){,1}(_Zbt){,1}(_Zkb){,1}(_Zkg){,1}(_Zkr){,1}(_Zks){,1}(_Zkn){,1}(_Zknd){,1}(_Zkne){,1}(_Zknh){,1}(_Zkse){,1}(_Zksh){,1}(_Ztso){,1}(_Zca){,1}(_Zcf){,1}(_Zcd){,1}(_Zcb){,1}(_Zcmp){,1}(_Zcmt){,1}$")
-
 # regex to find <msb>..<lsb>=<val> patterns in instruction
 fixed_ranges = re.compile(
     '\s*(?P<msb>\d+.?)\.\.(?P<lsb>\d+.?)\s*=\s*(?P<val>\d[\w]*)[\s$]*', re.M)
@@ -12,8 +9,12 @@ fixed_ranges = re.compile(
 #single_fixed = re.compile('\s+(?P<lsb>\d+)=(?P<value>[\w\d]*)[\s$]*', re.M)
 single_fixed = re.compile('(?:^|[\s])(?P<lsb>\d+)=(?P<value>[\w]*)((?=\s|$))', re.M)
 
-# regex to find the overloading condition variable
-var_regex = re.compile('(?P<var>[a-zA-Z][\w\d]*)\s*=\s*.*?[\s$]*', re.M)
+# regex to find the whitespace allowed around the '=' of bit assignments, so
+# that the fields of an instruction can be split on whitespace
+assign_spaces = re.compile('\s*=\s*')
+
+# regex to find the wildcard characters of a glob pattern
+glob_magic = re.compile('[*?[]')
 
 # regex for pseudo op instructions returns the dependent filename, dependent
 # instruction, the pseudo op name and the encoding string
@@ -23,6 +24,25 @@ pseudo_regex = re.compile(
 
 imported_regex = re.compile('^\s*\$import\s*(?P<extension>.*)\s*::\s*(?P<instruction>.*)', re.M)
 
+# base ISAs covered by an encoding file, keyed by the file name prefix. Files
+# with the plain rv prefix hold instructions common to rv32 and rv64, so two
+# files share a base ISA whenever their masks intersect.
+base_ext_mask = {
+  'rv32': 0x1,
+  'rv64': 0x2,
+  'rv': 0x3,
+  'rv128': 0x4,
+}
+
+# suffix appended to the name of an extension in the chisel output, keyed by
+# the file name prefix like base_ext_mask above
+chisel_ext_suffix = {
+  'rv32': '32',
+  'rv64': '64',
+  'rv': '',
+  'rv128': '128',
+}
+
 #
 # Trap cause codes
 causes = [
@@ -637,6 +657,10 @@ arg_lut['c_rs2'] = (6,2)
 arg_lut['c_sreg1'] = (9,7)
 arg_lut['c_sreg2'] = (4,2)
 
+# bit mask of the positions covered by each argument of arg_lut, used to find
+# overlapping arguments with a single AND
+arg_mask = {a: ((1 << (msb - lsb + 1)) - 1) << lsb for (a, (msb, lsb)) in arg_lut.items()}
+
 # dictionary containing the mapping of the argument to the what the fields in
 # the latex table should be
 latex_mapping = {}
@@ -720,13 +744,17 @@ latex_inst_type['U-type'] = {}
 latex_inst_type['U-type']['variable_fields'] = ['opcode', 'rd', 'imm20']
 latex_inst_type['J-type'] = {}
 latex_inst_type['J-type']['variable_fields'] = ['opcode', 'rd', 'jimm20']
-latex_fixed_fields = []
-latex_fixed_fields.append((31,25))
-latex_fixed_fields.append((24,20))
-latex_fixed_fields.append((19,15))
-latex_fixed_fields.append((14,12))
-latex_fixed_fields.append((11,7))
-latex_fixed_fields.append((6,0))
+# (msb, lsb) boundaries at which runs of fixed bits are split in the latex
+# tables. It is only tested for membership, once per bit of every instruction,
+# so it is kept as a set.
+latex_fixed_fields = frozenset([
+  (31,25),
+  (24,20),
+  (19,15),
+  (14,12),
+  (11,7),
+  (6,0),
+])
 
 # Pseudo-ops present in the generated encodings.
 # By default pseudo-ops are not listed as they are considered aliases
@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
 
 from constants import *
-import re
 import glob
+import fnmatch
 import os
-import pprint
 import logging
 import collections
+import functools
 import yaml
 import sys
+import types
 
-pp = pprint.PrettyPrinter(indent=2)
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:: %(message)s')
 
-def process_enc_line(line, ext):
+@functools.lru_cache(maxsize=None)
+def parse_enc_line(line, ext):
     '''
     This function processes each line of the encoding files (rv*). As part of
     the processing, the function ensures that the encoding is legal through the
@@ -42,109 +43,283 @@ def process_enc_line(line, ext):
     '''
     single_dict = {}
 
-    # fill all bits with don't care. we use '-' to represent don't care
+    # integer match and mask of the fixed bits, accumulated as the fields are
+    # assigned below. Bits not set in mask are don't care, and the encoding
+    # string is derived from both once all fields are assigned.
     # TODO: hardcoded for 32-bits.
-    encoding = ['-'] * 32
+    match = 0
+    mask = 0
 
-    # get the name of instruction by splitting based on the first space
-    [name, remaining] = line.split(' ', 1)
+    # get the name of instruction by splitting based on the first run of
+    # whitespace
+    [inst_name, remaining] = line.split(None, 1)
 
     # replace dots with underscores as dot doesn't work with C/Sverilog, etc
-    name = name.replace('.', '_')
-
-    # remove leading whitespaces
-    remaining = remaining.lstrip()
+    name = sys.intern(inst_name.replace('.', '_'))
+
+    # split the fields into arguments, <msb>..<lsb>=<val> range assignments and
+    # <lsb>=<val> single bit assignments. Arguments never contain '=', so only
+    # the bit assignments are matched against the regexes in constants.py.
+    # Whitespace around '=' is dropped first so each assignment is one field.
+    # The regexes also accept some values that are not numbers (e.g. 12=x), so
+    # converting the positions and values is part of validating a field.
+    args = []
+    ranges = []
+    singles = []
+    for field in assign_spaces.sub('=', remaining).split():
+        if '=' not in field:
+            # the same few argument names recur across every instruction
+            args.append(sys.intern(field))
+            continue
+        try:
+            if '..' in field:
+                m = fixed_ranges.fullmatch(field)
+                if m:
+                    ranges.append((int(m['msb']), int(m['lsb']), int(m['val'], 0)))
+                    continue
+            else:
+                m = single_fixed.fullmatch(field)
+                if m:
+                    singles.append((int(m['lsb'], 0), int(m['value'], 0)))
+                    continue
+        except ValueError:
+            pass
+        logging.error(
+            f'{inst_name:<10} has an invalid bit assignment {field} in it\'s encoding'
+        )
+        raise SystemExit(1)
 
     # check each field for it's length and overlapping bits
     # ex: 1..0=5 will result in an error --> x<y
     # ex: 5..0=0 2..1=2 --> overlapping bits
-    for (s2, s1, entry) in fixed_ranges.findall(remaining):
-        msb = int(s2)
-        lsb = int(s1)
+    for (msb, lsb, entry_value) in ranges:
 
         # check msb < lsb
         if msb < lsb:
             logging.error(
-                f'{line.split(" ")[0]:<10} has position {msb} less than position {lsb} in it\'s encoding'
+                f'{inst_name:<10} has position {msb} less than position {lsb} in it\'s encoding'
+            )
+            raise SystemExit(1)
+
+        if msb > 31:
+            logging.error(
+                f'{inst_name:<10} has position {msb} outside of the 32-bit encoding'
             )
             raise SystemExit(1)
 
         # illegal value assigned as per bit width
-        entry_value = int(entry, 0)
         if entry_value >= (1 << (msb - lsb + 1)):
             logging.error(
-                f'{line.split(" ")[0]:<10} has an illegal value {entry_value} assigned as per the bit width {msb - lsb}'
+                f'{inst_name:<10} has an illegal value {entry_value} assigned as per the bit width {msb - lsb}'
             )
             raise SystemExit(1)
 
-        for ind in range(lsb, msb + 1):
-            # overlapping bits
-            if encoding[31 - ind] != '-':
-                logging.error(
-                    f'{line.split(" ")[0]:<10} has {ind} bit overlapping in it\'s opcodes'
-                )
-                raise SystemExit(1)
-            bit = str((entry_value >> (ind - lsb)) & 1)
-            encoding[31 - ind] = bit
-
-    # extract bit pattern assignments of the form hi..lo=val
-    remaining = fixed_ranges.sub(' ', remaining)
-
-    # do the same as above but for <lsb>=<val> pattern. single_fixed is a regex
-    # expression present in constants.py
-    for (lsb, value, drop) in single_fixed.findall(remaining):
-        lsb = int(lsb, 0)
-        value = int(value, 0)
-        if encoding[31 - lsb] != '-':
+        # overlapping bits. The whole range is checked against the mask at
+        # once; the lowest offending bit is reported.
+        range_mask = ((1 << (msb - lsb + 1)) - 1) << lsb
+        if mask & range_mask:
+            ind = ((mask & range_mask) & -(mask & range_mask)).bit_length() - 1
+            logging.error(
+                f'{inst_name:<10} has {ind} bit overlapping in it\'s opcodes'
+            )
+            raise SystemExit(1)
+        match |= entry_value << lsb
+        mask |= range_mask
+
+    # do the same as above but for <lsb>=<val> pattern
+    for (lsb, value) in singles:
+        if value > 1:
+            logging.error(
+                f'{inst_name:<10} has an illegal value {value} assigned to bit {lsb}'
+            )
+            raise SystemExit(1)
+        if lsb > 31:
+            logging.error(
+                f'{inst_name:<10} has position {lsb} outside of the 32-bit encoding'
+            )
+            raise SystemExit(1)
+        if mask & (1 << lsb):
             logging.error(
-                f'{line.split(" ")[0]:<10} has {lsb} bit overlapping in it\'s opcodes'
+                f'{inst_name:<10} has {lsb} bit overlapping in it\'s opcodes'
             )
             raise SystemExit(1)
-        encoding[31 - lsb] = str(value)
+        match |= value << lsb
+        mask |= 1 << lsb
 
-    # convert the list of encodings into a single string for match and mask
-    match = "".join(encoding).replace('-','0')
-    mask = "".join(encoding).replace('0','1').replace('-','0')
+    # build the encoding string once all fixed bits are set. we use '-' to
+    # represent don't care
+    encoding_str = ''.join(
+        bit if fixed == '1' else '-'
+        for (fixed, bit) in zip(f'{mask:032b}', f'{match:032b}'))
 
     # check if all args of the instruction are present in arg_lut present in
-    # constants.py
-    args = single_fixed.sub(' ', remaining).split()
-    encoding_args = encoding.copy()
-    for a in args:
+    # constants.py. The bits taken so far are tracked as a mask so that an
+    # overlap is found with a single AND against the argument's arg_mask.
+    used = mask
+    for (i, a) in enumerate(args):
         if a not in arg_lut:
             logging.error(f' Found variable {a} in instruction {name} whose mapping in arg_lut does not exist')
             raise SystemExit(1)
-        else:
-            (msb, lsb) = arg_lut[a]
-            for ind in range(lsb, msb + 1):
-                # overlapping bits
-                if encoding_args[31 - ind] != '-':
-                    logging.error(f' Found variable {a} in instruction {name} overlapping {encoding_args[31 - ind]} variable in bit {ind}')
-                    raise SystemExit(1)
-                encoding_args[31 - ind] = a
+        overlap = used & arg_mask[a]
+        if overlap:
+            # report the lowest overlapping bit, and the fixed value or the
+            # earlier argument it is taken by
+            ind = (overlap & -overlap).bit_length() - 1
+            if mask >> ind & 1:
+                owner = encoding_str[31 - ind]
+            else:
+                owner = next(b for b in args[:i] if arg_mask[b] >> ind & 1)
+            logging.error(f' Found variable {a} in instruction {name} overlapping {owner} variable in bit {ind}')
+            raise SystemExit(1)
+        used |= arg_mask[a]
 
     # update the fields of the instruction as a dict and return back along with
     # the name of the instruction
-    single_dict['encoding'] = "".join(encoding)
+    # the encoding is interned as it is used as a key of the encoding index in
+    # create_inst_dict and compared against other instructions' encodings
+    single_dict['encoding'] = sys.intern(encoding_str)
     single_dict['variable_fields'] = args
-    single_dict['extension'] = [ext.split('/')[-1]]
-    single_dict['match']=hex(int(match,2))
-    single_dict['mask']=hex(int(mask,2))
+    # all instructions of a file share a single interned copy of its name
+    single_dict['extension'] = [sys.intern(ext.split('/')[-1])]
+    single_dict['match']=hex(match)
+    single_dict['mask']=hex(mask)
 
     return (name, single_dict)
 
-def same_base_ext (ext_name, ext_name_list):
-    type1 = ext_name.split("_")[0]
-    for ext_name1 in ext_name_list:
-        type2 = ext_name1.split("_")[0]
-        # "rv" mean insn for rv32 and rv64
-        if (type1 == type2 or
-            (type2 == "rv" and (type1 == "rv32" or type1 == "rv64")) or
-            (type1 == "rv" and (type2 == "rv32" or type2 == "rv64"))):
-            return True
-    return False
-
-def create_inst_dict(file_filter, include_pseudo=False, include_pseudo_ops=[]):
+def process_enc_line(line, ext):
+    '''
+    Returns the name and dictionary of the instruction described by line, as
+    computed by parse_enc_line. The same lines are parsed again every time
+    create_inst_dict is called (once per latex table, and once more for the C
+    header), so parse_enc_line is memoized and this function hands out a copy
+    of its result since callers go on to extend the extension list.
+    '''
+    (name, single_dict) = parse_enc_line(line, ext)
+    single_dict = dict(single_dict)
+    single_dict['variable_fields'] = list(single_dict['variable_fields'])
+    single_dict['extension'] = list(single_dict['extension'])
+    return (name, single_dict)
+
+@functools.lru_cache(maxsize=None)
+def list_dir(dirname):
+    '''
+    Returns the set of entry names of the directory dirname, or an empty set if
+    it cannot be listed, e.g. as it does not exist or is a file. The directory
+    is only listed once, so looking files up in it afterwards needs no further
+    system calls.
+    '''
+    try:
+        return frozenset(os.listdir(dirname))
+    except OSError:
+        return frozenset()
+
+def match_files(pattern):
+    '''
+    Returns the paths matching the glob pattern like glob.glob does, but
+    matches the names in the cached listing of the pattern's directory so that
+    a directory is only read once however many patterns select files from it.
+    '''
+    (dirname, basename) = os.path.split(pattern)
+    if glob_magic.search(dirname):
+        return glob.glob(pattern)
+    names = list_dir(dirname)
+    # like glob, wildcards do not match hidden files
+    if not basename.startswith('.'):
+        names = [name for name in names if not name.startswith('.')]
+    return [f'{dirname}/{name}' for name in fnmatch.filter(names, basename)]
+
+@functools.lru_cache(maxsize=None)
+def get_ext_files():
+    '''
+    Returns a dictionary mapping each file name in the riscv-opcodes directory
+    and its unratified directory to its path. A name present in both maps to
+    the one in the riscv-opcodes directory.
+    '''
+    opcodes_dir = os.path.dirname(os.path.realpath(__file__))
+    ext_files = {}
+    for ext_dir in (f'{opcodes_dir}/unratified', opcodes_dir):
+        ext_files.update((ext, f'{ext_dir}/{ext}') for ext in list_dir(ext_dir))
+    return ext_files
+
+def get_ext_file(ext):
+    '''
+    Returns the path of the encoding file of the extension ext, looking in the
+    riscv-opcodes directory first and then in its unratified directory, or None
+    if neither has it.
+    '''
+    return get_ext_files().get(ext)
+
+# masks of the file name prefixes missing from base_ext_mask, keyed by prefix
+unknown_base_masks = {}
+
+@functools.lru_cache(maxsize=None)
+def get_base_ext_mask(ext_name):
+    '''
+    Returns the base_ext_mask (see constants.py) of the base ISAs covered by
+    the encoding file ext_name. A prefix missing from base_ext_mask gets a bit
+    of its own on first use, so that it only shares a base with files of the
+    same prefix.
+    '''
+    base = ext_name.split("_")[0]
+    if base in base_ext_mask:
+        return base_ext_mask[base]
+    if base not in unknown_base_masks:
+        first_bit = max(base_ext_mask.values()).bit_length()
+        unknown_base_masks[base] = 1 << (first_bit + len(unknown_base_masks))
+    return unknown_base_masks[base]
+
+# the encoding files are read and split up by the memoized helpers below, so
+# each file is only processed once however often the passes of create_inst_dict
+# walk it. Their results are shared by all callers, which is why they are
+# returned as tuples and read-only views.
+@functools.lru_cache(maxsize=None)
+def read_file(filename):
+    '''
+    Returns the contents of an encoding file.
+    '''
+    with open(filename) as fp:
+        return fp.read()
+
+@functools.lru_cache(maxsize=None)
+def read_lines(filename):
+    '''
+    Returns the lines of an encoding file with surrounding whitespace removed,
+    skipping blank lines and comment lines.
+    '''
+    lines = (line.strip() for line in read_file(filename).splitlines())
+    return tuple(line for line in lines if line and not line.startswith("#"))
+
+@functools.lru_cache(maxsize=None)
+def read_line_kinds(filename):
+    '''
+    Returns the lines of an encoding file grouped by kind under the keys
+    'instruction', '$import' and '$pseudo_op', one for each pass of
+    create_inst_dict.
+    '''
+    kinds = {'instruction': [], '$import': [], '$pseudo_op': []}
+    for line in read_lines(filename):
+        keyword = line.split(None, 1)[0]
+        if not keyword.startswith('$'):
+            keyword = 'instruction'
+        elif keyword not in kinds:
+            logging.error(f'Unknown keyword {keyword} in {filename}')
+            raise SystemExit(1)
+        kinds[keyword].append(line)
+    return types.MappingProxyType({k: tuple(v) for (k, v) in kinds.items()})
+
+@functools.lru_cache(maxsize=None)
+def get_enc_lines(filename):
+    '''
+    Returns a dictionary mapping the name of each regular instruction defined
+    in an encoding file to its line, where the pseudo op and import passes of
+    create_inst_dict look up the instructions they depend on.
+    '''
+    enc_lines = {}
+    for line in read_line_kinds(filename)['instruction']:
+        enc_lines.setdefault(line.split(None, 1)[0], line)
+    return types.MappingProxyType(enc_lines)
+
+def create_inst_dict(file_filter, include_pseudo=False, include_pseudo_ops=()):
     '''
     This function return a dictionary containing all instructions associated
     with an extension defined by the file_filter input. The file_filter input
@@ -182,127 +357,123 @@ def create_inst_dict(file_filter, include_pseudo=False, include_pseudo_ops=[]):
     '''
     opcodes_dir = os.path.dirname(os.path.realpath(__file__))
     instr_dict = {}
-
-    # file_names contains all files to be parsed in the riscv-opcodes directory
-    file_names = []
+    # include_pseudo_ops is tested once per pseudo op whose original
+    # instruction is selected, so it is turned into a set only once
+    include_pseudo_ops = frozenset(include_pseudo_ops)
+
+    # file_names contains all files to be parsed in the riscv-opcodes directory.
+    # Overlapping filters (e.g. 'rv*' and 'rv_i') match the same file more than
+    # once, so the matches are deduplicated before the passes below.
+    file_names = set()
     for fil in file_filter:
-        file_names += glob.glob(f'{opcodes_dir}/{fil}')
-    file_names.sort(reverse=True)
+        file_names.update(match_files(f'{opcodes_dir}/{fil}'))
+    file_names = sorted(file_names, reverse=True)
+
+    # base_masks holds, for each instruction of the first pass, the combined
+    # base_ext_mask of all the extensions it has been added from. It is kept
+    # up to date as extensions are added so the overlap checks below are a
+    # single AND instead of a walk over the extension list.
+    base_masks = {}
+    # encodings maps each encoding string of the first pass to a bucket of the
+    # OR of the base masks and the names of the instructions using it, so that
+    # only those are checked for overlaps, and only when the bucket's mask
+    # shares a base with the new instruction
+    encodings = {}
+
     # first pass if for standard/regular instructions
     logging.debug('Collecting standard instructions first')
     for f in file_names:
-        logging.debug(f'Parsing File: {f} for standard instructions')
-        with open(f) as fp:
-            lines = (line.rstrip()
-                     for line in fp)  # All lines including the blank ones
-            lines = list(line for line in lines if line)  # Non-blank lines
-            lines = list(
-                line for line in lines
-                if not line.startswith("#"))  # remove comment lines
-
-        # go through each line of the file
-        for line in lines:
-            # if the an instruction needs to be imported then go to the
-            # respective file and pick the line that has the instruction.
-            # The variable 'line' will now point to the new line from the
-            # imported file
-
-            # ignore all lines starting with $import and $pseudo
-            if '$import' in line or '$pseudo' in line:
-                continue
-            logging.debug(f'     Processing line: {line}')
+        logging.debug('Parsing File: %s for standard instructions', f)
+        # the extension name and its base mask are the same for every line of
+        # the file
+        ext_name = f.split("/")[-1]
+        ext_mask = get_base_ext_mask(ext_name)
+        # go through each regular instruction line of the file; $import and
+        # $pseudo_op lines are handled by the passes below
+        for line in read_line_kinds(f)['instruction']:
+            logging.debug('     Processing line: %s', line)
 
             # call process_enc_line to get the data about the current
             # instruction
             (name, single_dict) = process_enc_line(line, f)
-            ext_name = f.split("/")[-1]
 
             # if an instruction has already been added to the filtered
             # instruction dictionary throw an error saying the given
             # instruction is already imported and raise SystemExit
-            if name in instr_dict:
-                var = instr_dict[name]["extension"]
-                if same_base_ext(ext_name, var):
+            added_dict = instr_dict.get(name)
+            if added_dict is not None:
+                var = added_dict["extension"]
+                if ext_mask & base_masks[name]:
                     # disable same names on the same base extensions
                     err_msg = f'instruction : {name} from '
                     err_msg += f'{ext_name} is already '
                     err_msg += f'added from {var} in same base extensions'
                     logging.error(err_msg)
                     raise SystemExit(1)
-                elif instr_dict[name]['encoding'] != single_dict['encoding']:
+                elif added_dict['encoding'] != single_dict['encoding']:
                     # disable same names with different encodings on different base extensions
                     err_msg = f'instruction : {name} from '
                     err_msg += f'{ext_name} is already '
                     err_msg += f'added from {var} but each have different encodings in different base extensions'
                     logging.error(err_msg)
                     raise SystemExit(1)
-                instr_dict[name]['extension'].extend(single_dict['extension'])
+                var.extend(single_dict['extension'])
+                base_masks[name] |= ext_mask
+                encodings[single_dict['encoding']][0] |= ext_mask
             else:
-              for key in instr_dict:
-                  item = instr_dict[key]
-                  if item["encoding"] == single_dict['encoding'] and same_base_ext(ext_name, item["extension"]):
-                      # disable different names with same encodings on the same base extensions
-                      err_msg = f'instruction : {name} from '
-                      err_msg += f'{ext_name} has the same encoding with instruction {key} '
-                      err_msg += f'added from {item["extension"]} in same base extensions'
-                      logging.error(err_msg)
-                      raise SystemExit(1)
-
-            if name not in instr_dict:
+                (enc_mask, enc_names) = encodings.get(single_dict['encoding'], (0, ()))
+                if ext_mask & enc_mask:
+                    for key in enc_names:
+                        if ext_mask & base_masks[key]:
+                            # disable different names with same encodings on the same base extensions
+                            err_msg = f'instruction : {name} from '
+                            err_msg += f'{ext_name} has the same encoding with instruction {key} '
+                            err_msg += f'added from {instr_dict[key]["extension"]} in same base extensions'
+                            logging.error(err_msg)
+                            raise SystemExit(1)
+
                 # update the final dict with the instruction
                 instr_dict[name] = single_dict
+                base_masks[name] = ext_mask
+                bucket = encodings.setdefault(single_dict['encoding'], [0, []])
+                bucket[0] |= ext_mask
+                bucket[1].append(name)
 
     # second pass if for pseudo instructions
     logging.debug('Collecting pseudo instructions now')
     for f in file_names:
-        logging.debug(f'Parsing File: {f} for pseudo_ops')
-        with open(f) as fp:
-            lines = (line.rstrip()
-                     for line in fp)  # All lines including the blank ones
-            lines = list(line for line in lines if line)  # Non-blank lines
-            lines = list(
-                line for line in lines
-                if not line.startswith("#"))  # remove comment lines
-
-        # go through each line of the file
-        for line in lines:
-
-            # ignore all lines not starting with $pseudo
-            if '$pseudo' not in line:
-                continue
-            logging.debug(f'     Processing line: {line}')
+        logging.debug('Parsing File: %s for pseudo_ops', f)
+        # go through each $pseudo_op line of the file
+        for line in read_line_kinds(f)['$pseudo_op']:
+            logging.debug('     Processing line: %s', line)
 
             # use the regex pseudo_regex from constants.py to find the dependent
             # extension, dependent instruction, the pseudo_op in question and
             # its encoding
-            (ext, orig_inst, pseudo_inst, line) = pseudo_regex.findall(line)[0]
-            ext_file = f'{opcodes_dir}/{ext}'
+            m = pseudo_regex.match(line)
+            if not m:
+                logging.error(f'Malformed pseudo_op line in {f}: {line}')
+                raise SystemExit(1)
+            (ext, orig_inst, pseudo_inst, line) = m.groups()
 
             # check if the file of the dependent extension exist. Throw error if
             # it doesn't
-            if not os.path.exists(ext_file):
-                ext1_file = f'{opcodes_dir}/unratified/{ext}'
-                if not os.path.exists(ext1_file):
-                    logging.error(f'Pseudo op {pseudo_inst} in {f} depends on {ext} which is not available')
-                    raise SystemExit(1)
-                else:
-                    ext_file = ext1_file
+            ext_file = get_ext_file(ext)
+            if ext_file is None:
+                logging.error(f'Pseudo op {pseudo_inst} in {f} depends on {ext} which is not available')
+                raise SystemExit(1)
 
             # check if the dependent instruction exist in the dependent
             # extension. Else throw error.
-            found = False
-            for oline in open(ext_file):
-                if not re.findall(f'^\s*{orig_inst}\s+',oline):
-                    continue
-                else:
-                    found = True
-                    break
-            if not found:
+            if orig_inst not in get_enc_lines(ext_file):
                 logging.error(f'Orig instruction {orig_inst} not found in {ext}. Required by pseudo_op {pseudo_inst} present in {f}')
                 raise SystemExit(1)
 
 
-            (name, single_dict) = process_enc_line(pseudo_inst + ' ' + line, f)
+            # the shared parse result is only copied with process_enc_line once
+            # the pseudo op is known to be added below
+            enc_line = pseudo_inst + ' ' + line
+            (name, single_dict) = parse_enc_line(enc_line, f)
             # add the pseudo_op to the dictionary only if the original
             # instruction is not already in the dictionary.
             if orig_inst.replace('.','_') not in instr_dict \
@@ -311,83 +482,65 @@ def create_inst_dict(file_filter, include_pseudo=False, include_pseudo_ops=[]):
 
                 # update the final dict with the instruction
                 if name not in instr_dict:
-                    instr_dict[name] = single_dict
-                    logging.debug(f'        including pseudo_ops:{name}')
+                    instr_dict[name] = process_enc_line(enc_line, f)[1]
+                    logging.debug('        including pseudo_ops:%s', name)
             else:
-                logging.debug(f'        Skipping pseudo_op {pseudo_inst} since original instruction {orig_inst} already selected in list')
+                logging.debug('        Skipping pseudo_op %s since original instruction %s already selected in list', pseudo_inst, orig_inst)
 
     # third pass if for imported instructions
     logging.debug('Collecting imported instructions')
     for f in file_names:
-        logging.debug(f'Parsing File: {f} for imported ops')
-        with open(f) as fp:
-            lines = (line.rstrip()
-                     for line in fp)  # All lines including the blank ones
-            lines = list(line for line in lines if line)  # Non-blank lines
-            lines = list(
-                line for line in lines
-                if not line.startswith("#"))  # remove comment lines
-
-        # go through each line of the file
-        for line in lines:
-            # if the an instruction needs to be imported then go to the
-            # respective file and pick the line that has the instruction.
-            # The variable 'line' will now point to the new line from the
-            # imported file
-
-            # ignore all lines starting with $import and $pseudo
-            if '$import' not in line :
-                continue
-            logging.debug(f'     Processing line: {line}')
-
-            (import_ext, reg_instr) = imported_regex.findall(line)[0]
-            import_ext_file = f'{opcodes_dir}/{import_ext}'
+        logging.debug('Parsing File: %s for imported ops', f)
+        # go through each $import line of the file. The instruction needs to
+        # be imported so go to the respective file and pick the line that has
+        # the instruction.
+        for line in read_line_kinds(f)['$import']:
+            logging.debug('     Processing line: %s', line)
+
+            m = imported_regex.match(line)
+            if not m:
+                logging.error(f'Malformed import line in {f}: {line}')
+                raise SystemExit(1)
+            (import_ext, reg_instr) = m.groups()
 
             # check if the file of the dependent extension exist. Throw error if
             # it doesn't
-            if not os.path.exists(import_ext_file):
-                ext1_file = f'{opcodes_dir}/unratified/{import_ext}'
-                if not os.path.exists(ext1_file):
-                    logging.error(f'Instruction {reg_instr} in {f} cannot be imported from {import_ext}')
-                    raise SystemExit(1)
-                else:
-                    ext_file = ext1_file
-            else:
-                ext_file = import_ext_file
+            ext_file = get_ext_file(import_ext)
+            if ext_file is None:
+                logging.error(f'Instruction {reg_instr} in {f} cannot be imported from {import_ext}')
+                raise SystemExit(1)
 
             # check if the dependent instruction exist in the dependent
             # extension. Else throw error.
-            found = False
-            for oline in open(ext_file):
-                if not re.findall(f'^\s*{reg_instr}\s+',oline):
-                    continue
-                else:
-                    found = True
-                    break
-            if not found:
+            oline = get_enc_lines(ext_file).get(reg_instr)
+            if oline is None:
                 logging.error(f'imported instruction {reg_instr} not found in {ext_file}. Required by {line} present in {f}')
                 logging.error(f'Note: you cannot import pseudo/imported ops.')
                 raise SystemExit(1)
 
-            # call process_enc_line to get the data about the current
-            # instruction
-            (name, single_dict) = process_enc_line(oline, f)
+            # call parse_enc_line to get the data about the current
+            # instruction. The shared result is only copied with
+            # process_enc_line if the instruction is new to the dictionary.
+            (name, single_dict) = parse_enc_line(oline, f)
 
             # if an instruction has already been added to the filtered
             # instruction dictionary throw an error saying the given
             # instruction is already imported and raise SystemExit
-            if name in instr_dict:
-                var = instr_dict[name]["extension"]
-                if instr_dict[name]['encoding'] != single_dict['encoding']:
+            added_dict = instr_dict.get(name)
+            if added_dict is not None:
+                var = added_dict["extension"]
+                if added_dict['encoding'] != single_dict['encoding']:
                     err_msg = f'imported instruction : {name} in '
                     err_msg += f'{f.split("/")[-1]} is already '
                     err_msg += f'added from {var} but each have different encodings for the same instruction'
                     logging.error(err_msg)
                     raise SystemExit(1)
-                instr_dict[name]['extension'].extend(single_dict['extension'])
+                # the same instruction may be imported more than once into a
+                # file, but the file is only listed once as its extension
+                var.extend(e for e in single_dict['extension'] if e not in var)
             else:
                 # update the final dict with the instruction
-                instr_dict[name] = single_dict
+                instr_dict[name] = process_enc_line(oline, f)[1]
     return instr_dict
 
 def make_priv_latex_table():
@@ -487,6 +640,17 @@ def make_latex_table():
 
     latex_file.close()
 
+@functools.lru_cache(maxsize=None)
+def get_latex_field(arg):
+    '''
+    Returns the (msb, lsb, name) latex table entry for the instruction argument
+    arg, using its position in arg_lut and its name in latex_mapping. The same
+    few arguments are used by almost all instructions, so each entry is only
+    computed once.
+    '''
+    (msb, lsb) = arg_lut[arg]
+    return (msb, lsb, latex_mapping.get(arg, arg.replace('_','.')))
+
 def make_ext_latex_table(type_list, dataset, latex_file, ilen, caption):
     '''
     For a given collection of extensions this function dumps out a complete
@@ -588,24 +752,7 @@ def make_ext_latex_table(type_list, dataset, latex_file, ilen, caption):
         # and capture their positions using arg_lut.
         for f in type_dict[t]['variable_fields']:
             (msb, lsb) = arg_lut[f]
-            name = f if f not in latex_mapping else latex_mapping[f]
-            fields.append((msb, lsb, name))
-
-        # iterate through the 32 bits, starting from the msb, and assign
-        # argument names to the relevant portions of the instructions. This
-        # information is stored as a 3-element tuple containing the msb, lsb
-        # position of the arugment and the name of the argument.
-        msb = ilen - 1
-        y = ''
-        for r in range(0,ilen):
-            if y != '':
-                fields.append((msb,ilen-1-r+1,y))
-                y = ''
-            msb = ilen-1-r-1
-            if r == 31:
-                if y != '':
-                    fields.append((msb, 0, y))
-                y = ''
+            fields.append((msb, lsb, latex_mapping.get(f, f)))
 
         # sort the arguments in decreasing order of msb position
         fields.sort(key=lambda y: y[0], reverse=True)
@@ -636,7 +783,7 @@ def make_ext_latex_table(type_list, dataset, latex_file, ilen, caption):
 
         # if filter_list is not empty then use that as the official set of
         # instructions that need to be dumped into the latex table
-        inst_list = list(instr_dict.keys()) if not filter_list else filter_list
+        inst_list = instr_dict if not filter_list else filter_list
 
         # for each instruction create an latex table entry just like how we did
         # above with the instruction-type table.
@@ -645,17 +792,9 @@ def make_ext_latex_table(type_list, dataset, latex_file, ilen, caption):
             if inst not in instr_dict:
                 logging.error(f'in make_ext_latex_table: Instruction: {inst} not found in instr_dict')
                 raise SystemExit(1)
-            fields = []
-
-            # only if the argument is available in arg_lut we consume it, else
-            # throw error.
-            for f in instr_dict[inst]['variable_fields']:
-                if f not in arg_lut:
-                    logging.error(f'Found variable {f} in instruction {inst} whose mapping is not available')
-                    raise SystemExit(1)
-                (msb,lsb) = arg_lut[f]
-                name = f.replace('_','.') if f not in latex_mapping else latex_mapping[f]
-                fields.append((msb, lsb, name))
+            # process_enc_line has already checked that every argument is
+            # present in arg_lut, so the entries can be looked up directly.
+            fields = [get_latex_field(f) for f in instr_dict[inst]['variable_fields']]
 
             msb = ilen -1
             y = ''
@@ -736,41 +875,38 @@ def make_ext_latex_table(type_list, dataset, latex_file, ilen, caption):
     latex_file.write(header+content+endtable)
 
 def instr_dict_2_extensions(instr_dict):
-    extensions = []
-    for item in instr_dict.values():
-        if item['extension'][0] not in extensions:
-            extensions.append(item['extension'][0])
-    return extensions
+    # dict keys dedupe in insertion order without the linear list search
+    return list(dict.fromkeys(item['extension'][0] for item in instr_dict.values()))
 
 def make_chisel(instr_dict, spinal_hdl=False):
 
-    chisel_names=''
+    chisel_names = []
     cause_names_str=''
     csr_names_str = ''
     for i in instr_dict:
         if spinal_hdl:
-            chisel_names += f'  def {i.upper().replace(".","_"):<18s} = M"b{instr_dict[i]["encoding"].replace("-","-")}"\n'
-        # else:
-        #     chisel_names += f'  def {i.upper().replace(".","_"):<18s} = BitPat("b{instr_dict[i]["encoding"].replace("-","?")}")\n'
+            chisel_names.append(f'  def {i.upper().replace(".","_"):<18s} = M"b{instr_dict[i]["encoding"]}"\n')
     if not spinal_hdl:
+        # group the instructions by their first extension in a single walk
+        # instead of filtering the whole dictionary once per extension
+        ext_instrs = collections.defaultdict(list)
+        for i in instr_dict:
+            ext_instrs[instr_dict[i]['extension'][0]].append(i)
         extensions = instr_dict_2_extensions(instr_dict)
         for e in extensions:
-            e_instrs = filter(lambda i: instr_dict[i]['extension'][0] == e, instr_dict)
-            if "rv128_" in e:
-                e_format = e.replace("rv128_", "").upper() + "128"
-            elif "rv64_" in e:
-                e_format = e.replace("rv64_", "").upper() + "64"
-            elif "rv32_" in e:
-                e_format = e.replace("rv32_", "").upper() + "32"
-            elif "rv_" in e:
-                e_format = e.replace("rv_", "").upper()
+            e_instrs = ext_instrs[e]
+            (base, _, ext_name) = e.partition('_')
+            if base in chisel_ext_suffix:
+                e_format = ext_name.upper() + chisel_ext_suffix[base]
             else:
-                e_format = e.upper
-            chisel_names += f'  val {e_format+"Type"} = Map(\n'
+                # files of other prefixes, which create_inst_dict accepts as
+                # bases of their own, keep their full name, e.g. XV_ZBA
+                e_format = e.upper()
+            chisel_names.append(f'  val {e_format+"Type"} = Map(\n')
             for instr in e_instrs:
                 tmp_instr_name = '"'+instr.upper().replace(".","_")+'"'
-                chisel_names += f'   {tmp_instr_name:<18s} -> BitPat("b{instr_dict[instr]["encoding"].replace("-","?")}"),\n'
-            chisel_names += f'  )\n'
+                chisel_names.append(f'   {tmp_instr_name:<18s} -> BitPat("b{instr_dict[instr]["encoding"].replace("-","?")}"),\n')
+            chisel_names.append(f'  )\n')
 
     for num, name in causes:
         cause_names_str += f'  val {name.lower().replace(" ","_")} = {hex(num)}\n'
@@ -806,7 +942,7 @@ def make_chisel(instr_dict, spinal_hdl=False):
     chisel_file.write(f'''
 /* Automatically generated by parse_opcodes */
 object Instructions {{
-{chisel_names}
+{"".join(chisel_names)}
 }}
 object Causes {{
 {cause_names_str}
@@ -818,44 +954,49 @@ object CSRs {{
     chisel_file.close()
 
 def make_rust(instr_dict):
-    mask_match_str= ''
-    for i in instr_dict:
-        mask_match_str += f'const MATCH_{i.upper().replace(".","_")}: u32 = {(instr_dict[i]["match"])};\n'
-        mask_match_str += f'const MASK_{i.upper().replace(".","_")}: u32 = {(instr_dict[i]["mask"])};\n'
-    for num, name in csrs+csrs32:
-        mask_match_str += f'const CSR_{name.upper()}: u16 = {hex(num)};\n'
-    for num, name in causes:
-        mask_match_str += f'const CAUSE_{name.upper().replace(" ","_")}: u8 = {hex(num)};\n'
-    rust_file = open('inst.rs','w')
-    rust_file.write(f'''
+    # the constants are written out as they are generated rather than being
+    # collected into one string first
+    with open('inst.rs','w') as rust_file:
+        rust_file.write('''
 /* Automatically generated by parse_opcodes */
-{mask_match_str}
 ''')
-    rust_file.close()
+        for i in instr_dict:
+            name = i.upper().replace(".","_")
+            rust_file.write(f'const MATCH_{name}: u32 = {(instr_dict[i]["match"])};\n')
+            rust_file.write(f'const MASK_{name}: u32 = {(instr_dict[i]["mask"])};\n')
+        for num, name in csrs+csrs32:
+            rust_file.write(f'const CSR_{name.upper()}: u16 = {hex(num)};\n')
+        for num, name in causes:
+            rust_file.write(f'const CAUSE_{name.upper().replace(" ","_")}: u8 = {hex(num)};\n')
+        rust_file.write('\n')
 
 def make_sverilog(instr_dict):
-    names_str = ''
-    for i in instr_dict:
-        names_str += f"  localparam [31:0] {i.upper().replace('.','_'):<18s} = 32'b{instr_dict[i]['encoding'].replace('-','?')};\n"
-    names_str += '  /* CSR Addresses */\n'
-    for num, name in csrs+csrs32:
-        names_str += f"  localparam logic [11:0] CSR_{name.upper()} = 12'h{hex(num)[2:]};\n"
-
-    sverilog_file = open('inst.sverilog','w')
-    sverilog_file.write(f'''
+    # the parameters are written out as they are generated rather than being
+    # collected into one string first
+    with open('inst.sverilog','w') as sverilog_file:
+        sverilog_file.write('''
 /* Automatically generated by parse_opcodes */
 package riscv_instr;
-{names_str}
+''')
+        for i in instr_dict:
+            sverilog_file.write(f"  localparam [31:0] {i.upper().replace('.','_'):<18s} = 32'b{instr_dict[i]['encoding'].replace('-','?')};\n")
+        sverilog_file.write('  /* CSR Addresses */\n')
+        for num, name in csrs+csrs32:
+            sverilog_file.write(f"  localparam logic [11:0] CSR_{name.upper()} = 12'h{hex(num)[2:]};\n")
+        sverilog_file.write('''
 endpackage
 ''')
-    sverilog_file.close()
+
 def make_c(instr_dict):
-    mask_match_str = ''
-    declare_insn_str = ''
+    mask_match = []
+    declare_insn = []
     for i in instr_dict:
-        mask_match_str += f'#define MATCH_{i.upper().replace(".","_")} {instr_dict[i]["match"]}\n'
-        mask_match_str += f'#define MASK_{i.upper().replace(".","_")} {instr_dict[i]["mask"]}\n'
-        declare_insn_str += f'DECLARE_INSN({i.replace(".","_")}, MATCH_{i.upper().replace(".","_")}, MASK_{i.upper().replace(".","_")})\n'
+        name = i.upper().replace(".","_")
+        mask_match.append(f'#define MATCH_{name} {instr_dict[i]["match"]}\n')
+        mask_match.append(f'#define MASK_{name} {instr_dict[i]["mask"]}\n')
+        declare_insn.append(f'DECLARE_INSN({i.replace(".","_")}, MATCH_{name}, MASK_{name})\n')
+    mask_match_str = ''.join(mask_match)
+    declare_insn_str = ''.join(declare_insn)
 
     csr_names_str = ''
     declare_csr_str = ''
@@ -934,7 +1075,7 @@ func encode(a obj.As) *inst {
 }
 '''
 
-    instr_str = ''
+    instr = []
     for i in instr_dict:
         enc_match = int(instr_dict[i]['match'],0)
         opcode = (enc_match >> 0) & ((1<<7)-1)
@@ -942,13 +1083,13 @@ func encode(a obj.As) *inst {
         rs2 = (enc_match >> 20) & ((1<<5)-1)
         csr = (enc_match >> 20) & ((1<<12)-1)
         funct7 = (enc_match >> 25) & ((1<<7)-1)
-        instr_str += f'''  case A{i.upper().replace("_","")}:
+        instr.append(f'''  case A{i.upper().replace("_","")}:
     return &inst{{ {hex(opcode)}, {hex(funct3)}, {hex(rs2)}, {signed(csr,12)}, {hex(funct7)} }}
-'''
+''')
         
     with open('inst.go','w') as file:
         file.write(prelude)
-        file.write(instr_str)
+        file.writelines(instr)
         file.write(endoffile)
 
     try:
@@ -958,10 +1099,11 @@ func encode(a obj.As) *inst {
         pass
 
 def signed(value, width):
-  if 0 <= value < (1<<(width-1)):
-    return value
-  else:
-    return value - (1<<width)
+  # sign extend the width-bit unsigned value without branching: flipping the
+  # sign bit and subtracting it back leaves positive values unchanged and
+  # moves negative ones down by 1<<width
+  sign = 1 << (width-1)
+  return (value ^ sign) - sign
 
 
 if __name__ == "__main__":
@@ -979,13 +1121,16 @@ if __name__ == "__main__":
 
     instr_dict = create_inst_dict(extensions, include_pseudo)
     with open('instr_dict.yaml', 'w') as outfile:
-        yaml.dump(instr_dict, outfile, default_flow_style=False)
-    instr_dict = collections.OrderedDict(sorted(instr_dict.items()))
+        # use the libyaml based dumper when PyYAML was built with it
+        yaml.dump(instr_dict, outfile, default_flow_style=False,
+                  Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper))
+    # sort on the instruction names alone rather than on (name, dict) pairs
+    instr_dict = collections.OrderedDict((i, instr_dict[i]) for i in sorted(instr_dict))
 
     if '-c' in sys.argv[1:]:
         instr_dict_c = create_inst_dict(extensions, False, 
                                         include_pseudo_ops=emitted_pseudo_ops)
-        instr_dict_c = collections.OrderedDict(sorted(instr_dict_c.items()))
+        instr_dict_c = collections.OrderedDict((i, instr_dict_c[i]) for i in sorted(instr_dict_c))
         make_c(instr_dict_c)
         logging.info('encoding.out.h generated successfully')
 
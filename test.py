@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 from parse import *
+import glob
 import logging
+import os
 import unittest
 
 class EncodingLineTest(unittest.TestCase):
@@ -19,6 +21,12 @@ class EncodingLineTest(unittest.TestCase):
         self.assertEqual(data['match'], '0x37')
         self.assertEqual(data['mask'], '0x7f')
 
+    def test_memoized_copy(self):
+        _, data = process_enc_line('lui     rd imm20 6..2=0x0D 1=1 0=1', 'rv_i')
+        data['extension'].append('rv32_i')
+        _, data = process_enc_line('lui     rd imm20 6..2=0x0D 1=1 0=1', 'rv_i')
+        self.assertEqual(data['extension'], ['rv_i'])
+
     def test_overlapping(self):
         self.assertError('jol rd jimm20 6..2=0x00 3..0=7')
         self.assertError('jol rd jimm20 6..2=0x00 3=1')
@@ -28,12 +36,121 @@ class EncodingLineTest(unittest.TestCase):
     def test_invalid_order(self):
         self.assertError('jol 2..6=0x1b')
 
+    def test_out_of_range(self):
+        self.assertError('jol rd jimm20 35..32=1 6..0=3')
+        self.assertError('jol rd jimm20 32=1 6..0=3')
+
     def test_illegal_value(self):
         self.assertError('jol rd jimm20 2..0=10')
         self.assertError('jol rd jimm20 2..0=0xB')
+        self.assertError('jol rd jimm20 2=2')
+
+    def test_invalid_assignment(self):
+        self.assertError('jol rd jimm20 6..2= 1..0=3')
+        self.assertError('jol rd jimm20 6..2=0x1b rs1=3')
+        self.assertError('jol rd jimm20 6..2=0x1b 12=')
+        self.assertError('jol rd jimm20 6..2=0x1b 12=x')
+        self.assertError('jol rd jimm20 6..2=0x1b 12=01')
+        self.assertError('jol rd jimm20 6..2=0x1b 7..7=0xZ')
+
+    def test_spaced_assignment(self):
+        _, data = process_enc_line('lui     rd imm20 6..2 = 0x0D 1 = 1 0=1', 'rv_i')
+        self.assertEqual(data['variable_fields'], ['rd', 'imm20'])
+        self.assertEqual(data['match'], '0x37')
+        self.assertEqual(data['mask'], '0x7f')
 
     def test_overlapping_field(self):
         self.assertError('jol rd rs1 jimm20 6..2=0x1b 1..0=3')
 
     def test_illegal_field(self):
         self.assertError('jol rd jimm128 2..0=3')
+
+class ReadLineKindsTest(unittest.TestCase):
+    def test_frozen(self):
+        kinds = read_line_kinds(get_ext_file('rv_i'))
+        self.assertIsInstance(kinds['instruction'], tuple)
+        with self.assertRaises(TypeError):
+            kinds['instruction'] = ()
+
+    def test_enc_lines_frozen(self):
+        enc_lines = get_enc_lines(get_ext_file('rv_i'))
+        self.assertTrue(enc_lines['add'].startswith('add '))
+        with self.assertRaises(TypeError):
+            enc_lines['add'] = ''
+
+class BaseExtMaskTest(unittest.TestCase):
+    def assertSameBase(self, ext_name, other):
+        self.assertTrue(get_base_ext_mask(ext_name) & get_base_ext_mask(other))
+
+    def assertDifferentBase(self, ext_name, other):
+        self.assertFalse(get_base_ext_mask(ext_name) & get_base_ext_mask(other))
+
+    def test_same_base(self):
+        self.assertSameBase('rv32_zbb', 'rv32_zbkb')
+        self.assertSameBase('rv_zbb', 'rv64_zbb')
+        self.assertSameBase('rv64_zbb', 'rv_zbkb')
+
+    def test_different_base(self):
+        self.assertDifferentBase('rv32_zbb', 'rv64_zbb')
+        self.assertDifferentBase('rv128_i', 'rv_i')
+        self.assertDifferentBase('rv128_i', 'rv64_i')
+
+    def test_unknown_base(self):
+        self.assertSameBase('xv_x', 'xv_y')
+        self.assertDifferentBase('xv_x', 'rv_i')
+        self.assertDifferentBase('xv_x', 'rv128_i')
+        self.assertDifferentBase('xv_x', 'yv_x')
+
+class MatchFilesTest(unittest.TestCase):
+    def assertSameAsGlob(self, pattern):
+        pattern = f'{os.path.dirname(os.path.realpath(__file__))}/{pattern}'
+        self.assertEqual(sorted(match_files(pattern)), sorted(glob.glob(pattern)))
+
+    def test_wildcards(self):
+        self.assertSameAsGlob('rv*')
+        self.assertSameAsGlob('unratified/rv*')
+        self.assertSameAsGlob('rv32_?')
+
+    def test_literal(self):
+        self.assertSameAsGlob('rv_i')
+        self.assertSameAsGlob('rv_none')
+
+    def test_file_as_directory(self):
+        self.assertSameAsGlob('rv_i/*')
+        self.assertEqual(create_inst_dict(['rv_i/*']), {})
+
+    def test_wildcard_directory(self):
+        self.assertSameAsGlob('unratified*/rv_zvbb')
+
+class ArgLutTest(unittest.TestCase):
+    def test_positions(self):
+        for (arg, position) in arg_lut.items():
+            with self.subTest(arg=arg):
+                self.assertIsInstance(position, tuple)
+                self.assertEqual(len(position), 2)
+                (msb, lsb) = position
+                self.assertTrue(31 >= msb >= lsb >= 0)
+
+    def test_hi_lo_pairs(self):
+        for arg in arg_lut:
+            if not arg.endswith('hi'):
+                continue
+            lo = arg[:-2] + 'lo'
+            with self.subTest(arg=arg):
+                self.assertIn(lo, arg_lut)
+                self.assertFalse(arg_mask[arg] & arg_mask[lo])
+                self.assertGreater(arg_lut[arg][1], arg_lut[lo][0])
+
+    def test_latex_fields(self):
+        for t in latex_inst_type.values():
+            for f in t['variable_fields']:
+                self.assertIn(f, arg_lut)
+        for f in latex_mapping:
+            self.assertIn(f, arg_lut)
+
+class SignedTest(unittest.TestCase):
+    def test_signed(self):
+        self.assertEqual(signed(0, 12), 0)
+        self.assertEqual(signed(0x7ff, 12), 2047)
+        self.assertEqual(signed(0x800, 12), -2048)
+        self.assertEqual(signed(0xfff, 12), -1)